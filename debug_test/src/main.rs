@@ -43,12 +43,29 @@ fn main() {
     let inline_inline = SmolStr::new_inline("inline");
     let from_string = SmolStr::from(String::from("from string"));
 
+    // Array of SmolStrs - inline elements are read from the array's data
+    let smolstr_array: [SmolStr; 4] = [
+        SmolStr::new(""),
+        SmolStr::new("first"),
+        SmolStr::new("second"),
+        SmolStr::new("a heap allocated string stored in an array"),
+    ];
+
     // SmallVec variants
     let inline_smallvec: SmallVec<u64, 2> = SmallVec::from([1, 2]);
     let heap_smallvec: SmallVec<u64, 2> = SmallVec::from([1, 2, 4, 5]);
     let empty_smallvec: SmallVec<u32, 4> = SmallVec::new();
     let single_smallvec: SmallVec<i32, 3> = SmallVec::from([42]);
 
+    // SmallVec elements that are themselves formatted by this module
+    let smolstr_smallvec: SmallVec<SmolStr, 4> = SmallVec::from([
+        SmolStr::new("inline"),
+        SmolStr::new_static(STATIC_STR),
+        SmolStr::new("a heap allocated string stored in a SmallVec"),
+    ]);
+    let nested_smallvec: SmallVec<SmallVec<u32, 2>, 2> =
+        SmallVec::from([SmallVec::from([1, 2]), SmallVec::from([3, 4, 5])]);
+
     // Regular Vec for comparison
     let test_vec: Vec<u64> = vec![10, 20, 30];
 
@@ -91,10 +108,13 @@ fn main() {
     println!("heap_repeated: {}", heap_repeated);
     println!("inline_inline: {}", inline_inline);
     println!("from_string: {}", from_string);
+    println!("smolstr_array: {:?}", smolstr_array);
     println!("inline_smallvec: {:?}", inline_smallvec);
     println!("heap_smallvec: {:?}", heap_smallvec);
     println!("empty_smallvec: {:?}", empty_smallvec);
     println!("single_smallvec: {:?}", single_smallvec);
+    println!("smolstr_smallvec: {:?}", smolstr_smallvec);
+    println!("nested_smallvec: {:?}", nested_smallvec);
     println!("test_vec: {:?}", test_vec);
     println!("some_f32: {:?}", some_f32);
     println!("none_f32: {:?}", none_f32);
@@ -122,6 +142,8 @@ fn main() {
         heap_smallvec.len(),
         empty_smallvec.len(),
         single_smallvec.len(),
+        smolstr_smallvec.len(),
+        nested_smallvec.len(),
         test_vec.len(),
     ];
 
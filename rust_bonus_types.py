@@ -5,174 +5,384 @@ LLDB debugging support for third-party Rust types
 from __future__ import annotations
 
 import re
-import sys
 from typing import TYPE_CHECKING
 
 import lldb
 from lldb import SBError
 
 if TYPE_CHECKING:
-    from lldb import SBValue
+    from lldb import SBData, SBProcess, SBType, SBValue
 
-PY3 = sys.version_info[0] == 3
+# Upper bound for reading a SmallVec's elements in one go
+MAX_BULK_READ_SIZE = 128 * 1024 * 1024
 
+# SmallVec elements read ahead in one go, LLDB's default max-children-count
+PREFETCH_ELEMENTS = 256
 
-def SmolStrSummaryProvider(valobj: SBValue, _dict) -> str:
+# Size of SmolStr's inline buffer, the longest string stored without a pointer
+INLINE_CAPACITY = 23
+
+# Size of the strong and weak counts that precede the data of an Arc<str>
+ARC_HEADER_SIZE = 16
+
+# Strings up to this length are fetched with a fixed-size read window, so the
+# memory cache can also serve neighbouring reads of the same allocation
+SMALL_READ_THRESHOLD = 64
+SMALL_READ_WINDOW = 128
+
+# Child index paths resolved by name once per (type key, path)
+_CHILD_PATH_CACHE: dict[tuple, tuple[int, ...]] = {}
+
+# (Repr size, (offset, size) of data_ptr, (offset, size) of length) of a Heap
+# SmolStr's Arc<str> relative to the Repr enum, per Repr type; None for types
+# whose fields could not be located
+_HEAP_LAYOUT_CACHE: dict[tuple, tuple | None] = {}
+
+# (element type, element size) per concrete SmallVec<T, N> type, shared by
+# every SmallVec of that type
+_ELEM_TYPE_CACHE: dict[tuple, tuple[SBType, int]] = {}
+
+# (offset, size) of SmallVec's len.__0 per concrete SmallVec<T, N> type
+_SMALLVEC_LEN_LAYOUT: dict[tuple, tuple[int, int]] = {}
+
+
+def _type_key(valobj: SBValue) -> tuple[str, str] | None:
     """
-    Summary provider for smol_str::SmolStr
+    Identify the type of valobj for the per-type caches
 
-    SmolStr uses an internal Repr enum with three variants:
-    - Inline (discriminant 0-23): small strings stored inline, discriminant is the length
-    - Static (discriminant 0x18=24): reference to static string
-    - Heap (discriminant >= 0x19=25): Arc-allocated string on heap
+    The type name alone is not enough: rebuilding the program can change the
+    layout behind an unchanged name. The UUID of the module defining the type
+    changes with every build and stays the same across runs, with or without
+    a process.
+
+    Returns:
+        A (module UUID, type name) tuple, or None if the module has no UUID,
+        in which case nothing about the type should be cached
+    """
+    uuid = valobj.GetType().GetModule().GetUUIDString()
+    if not uuid:
+        return None
+    return (uuid, valobj.GetTypeName())
+
+
+def _resolve_path(
+    valobj: SBValue, type_key: tuple | None, path: tuple[str, ...]
+) -> SBValue:
+    """
+    Follow a chain of member names starting at valobj
+
+    Name lookups scan the type's members, so the child indices are cached per
+    type the first time a path is walked and reused via GetChildAtIndex. A
+    replayed path whose last child has the wrong name is walked by name again.
+    Only worth it for paths of several names; single lookups should use
+    GetChildMemberWithName directly.
 
     Args:
-        valobj: The SmolStr value to format
-        _dict: LLDB internal bookkeeping parameter
+        valobj: The value to start from
+        type_key: Identifies the type of valobj, computed once by the caller,
+            or None to walk the names without caching
+        path: The member names to follow
 
     Returns:
-        A string representation like "hello" with quotes
+        The child at the end of the path, or an invalid SBValue
     """
-    # Get the internal Repr enum
-    valobj = valobj.GetNonSyntheticValue()
-    repr_enum = valobj.GetChildAtIndex(0)
+    key = (type_key, path)
+    indices = _CHILD_PATH_CACHE.get(key) if type_key is not None else None
+    if indices is not None:
+        child = valobj
+        for index in indices:
+            child = child.GetChildAtIndex(index)
+        if child.GetName() == path[-1]:
+            return child
+
+    resolved = []
+    for name in path:
+        index = valobj.GetIndexOfChildWithName(name)
+        valobj = valobj.GetChildAtIndex(index)
+        if not valobj.IsValid():
+            return valobj
+        resolved.append(index)
+
+    if type_key is not None:
+        _CHILD_PATH_CACHE[key] = tuple(resolved)
+    return valobj
+
+
+def _field_layout(sbtype: SBType, path: tuple[str, ...]) -> tuple[int, int] | None:
+    """
+    Locate the member at the end of a chain of field names within sbtype
 
-    # Get the $variants$ field (LLDB encoded enum)
-    variants = repr_enum.GetChildMemberWithName("$variants$")
-    if not variants.IsValid():
-        return '""'
+    Works on types alone, so the result holds for every value of sbtype,
+    including ones that do not live in memory.
 
-    # Get discriminant from $variant$24 (which contains $discr$ field)
-    variant24 = variants.GetChildMemberWithName("$variant$24")
-    if not variant24.IsValid():
-        return '""'
+    Returns:
+        The (offset, size) of the member in bytes, or None if a name is missing
+    """
+    offset = 0
+    for name in path:
+        sbtype = sbtype.GetCanonicalType()
+        for index in range(sbtype.GetNumberOfFields()):
+            field = sbtype.GetFieldAtIndex(index)
+            if field.GetName() == name:
+                break
+        else:
+            return None
+        offset += field.GetOffsetInBytes()
+        sbtype = field.GetType()
+    return (offset, sbtype.GetByteSize())
+
+
+_DATA_READERS = {
+    1: lldb.SBData.GetUnsignedInt8,
+    2: lldb.SBData.GetUnsignedInt16,
+    4: lldb.SBData.GetUnsignedInt32,
+    8: lldb.SBData.GetUnsignedInt64,
+}
+
+
+def _read_data_unsigned(data: SBData, offset: int, size: int) -> int | None:
+    """Read an unsigned integer of size bytes at offset in a value's data"""
+    reader = _DATA_READERS.get(size)
+    if reader is None:
+        return None
+    error = SBError()
+    value = reader(data, error, offset)
+    if not error.Success():
+        return None
+    return value
+
+
+def _read_string(
+    process: SBProcess,
+    ptr: int,
+    length: int,
+    header_skip: int = 0,
+    window: int = SMALL_READ_WINDOW,
+) -> bytes | None:
+    """
+    Read string bytes that follow a header of header_skip bytes at ptr
+
+    Header and payload are fetched with a single ReadMemory call. Short
+    strings read a window sized block and fall back to an exact read if the
+    window runs into unreadable memory.
+
+    Returns:
+        The length payload bytes, or None if the memory could not be read
+    """
+    size = header_skip + length
+    if length <= SMALL_READ_THRESHOLD:
+        error = SBError()
+        data = process.ReadMemory(ptr, max(size, window), error)
+        if error.Success() and len(data) >= size:
+            return data[header_skip:size]
+
+    error = SBError()
+    data = process.ReadMemory(ptr, size, error)
+    if not error.Success() or len(data) < size:
+        return None
+    return data[header_skip:]
+
+
+def _fast_quote(data: bytes) -> str:
+    """
+    Quote string bytes for a summary
 
-    discr_field = variant24.GetChildMemberWithName("$discr$")
+    ASCII strings, the common case, are detected with bytes.isascii() and
+    decoded without the UTF-8 decoder; anything else goes through the
+    regular "replace" decode.
+    """
+    if data.isascii():
+        return '"' + data.decode("ascii") + '"'
+    return '"%s"' % data.decode("utf-8", "replace")
+
+
+# _decode_smolstr() result for the empty Inline string
+_EMPTY_INLINE = ("Inline", 0, 0, 0, b"")
+
+# Path from the Repr enum to the Arc<str> fat pointer of a Heap SmolStr
+_ARC_POINTER_PATH = ("$variants$", "$variant$25", "value", "__0", "ptr", "pointer")
+
+
+def _read_heap_fields(
+    repr_enum: SBValue, type_key: tuple | None
+) -> tuple[int, int] | None:
+    """
+    Read data_ptr and length of the Arc<str> in a Heap SmolStr
+
+    Where data_ptr and length live within the Repr is worked out from the
+    type once per Repr type; both are then read from the Repr's own data
+    rather than by walking the six fields down to the fat pointer. Data of a
+    different size than the type the layout was computed for is never read
+    at the cached offsets.
+
+    Returns:
+        A (data_ptr, length) tuple, or None if the fields could not be read
+    """
+    if type_key in _HEAP_LAYOUT_CACHE:
+        layout = _HEAP_LAYOUT_CACHE[type_key]
+    else:
+        repr_type = repr_enum.GetType()
+        data_ptr_layout = _field_layout(repr_type, _ARC_POINTER_PATH + ("data_ptr",))
+        length_layout = _field_layout(repr_type, _ARC_POINTER_PATH + ("length",))
+        layout = None
+        if data_ptr_layout is not None and length_layout is not None:
+            layout = (repr_type.GetByteSize(), data_ptr_layout, length_layout)
+        if type_key is not None:
+            _HEAP_LAYOUT_CACHE[type_key] = layout
+
+    if layout is not None:
+        repr_size, data_ptr_layout, length_layout = layout
+        data = repr_enum.GetData()
+        if data.GetByteSize() == repr_size:
+            data_ptr_value = _read_data_unsigned(data, *data_ptr_layout)
+            length_value = _read_data_unsigned(data, *length_layout)
+            if data_ptr_value is not None and length_value is not None:
+                return (data_ptr_value, length_value)
+
+    arc_pointer = _resolve_path(repr_enum, type_key, _ARC_POINTER_PATH)
+    if not arc_pointer.IsValid():
+        return None
+
+    data_ptr = arc_pointer.GetChildMemberWithName("data_ptr")
+    length_field = arc_pointer.GetChildMemberWithName("length")
+
+    if not data_ptr.IsValid() or not length_field.IsValid():
+        return None
+
+    return (data_ptr.GetValueAsUnsigned(), length_field.GetValueAsUnsigned())
+
+
+def _decode_smolstr(
+    repr_enum: SBValue, read_content: bool = True
+) -> tuple[str, int, int, int, bytes | None]:
+    """
+    Decode the internal Repr enum of a smol_str::SmolStr
+
+    Shared by the summary and synthetic providers so the variant layout is
+    only described once.
+
+    Args:
+        repr_enum: The non-synthetic Repr child of the SmolStr
+        read_content: Whether to read the string bytes from the process
+
+    Returns:
+        A (variant name, length, pointer, content address, content) tuple.
+        pointer is 0 for Inline strings and content is None if the bytes
+        were not requested or could not be read.
+    """
+    # All paths below start at the Repr, so identify its type only once
+    type_key = _type_key(repr_enum)
+
+    # Get discriminant from $variant$24 (which contains $discr$ field)
+    discr_field = _resolve_path(
+        repr_enum, type_key, ("$variants$", "$variant$24", "$discr$")
+    )
     if not discr_field.IsValid():
-        return '""'
+        return ("", 0, 0, 0, None)
 
     discriminant = discr_field.GetValueAsUnsigned()
 
+    # Empty strings (e.g. default-constructed fields) are common: an Inline
+    # string of length 0 needs no further lookups
+    if discriminant == 0:
+        return _EMPTY_INLINE
+
     # Inline variant: discriminant is 0-23 (the length)
-    if discriminant <= 23:
+    if discriminant <= INLINE_CAPACITY:
+        variant_name = "Inline"
         length = discriminant
-        if length == 0:
-            return '""'
 
         # Get the inline buffer from $variant$
-        variant0 = variants.GetChildMemberWithName("$variant$")
-        if not variant0.IsValid():
-            return '""'
-
-        value = variant0.GetChildMemberWithName("value")
-        if not value.IsValid():
-            return '""'
-
-        buf = value.GetChildMemberWithName("buf")
+        buf = _resolve_path(
+            repr_enum, type_key, ("$variants$", "$variant$", "value", "buf")
+        )
         if not buf.IsValid():
-            return '""'
+            return (variant_name, length, 0, 0, None)
 
-        # Read bytes from the buffer
-        error = SBError()
         process = buf.GetProcess()
-        data = process.ReadMemory(buf.GetLoadAddress(), length, error)
-        if error.Success():
-            if PY3:
-                try:
-                    data = data.decode("utf-8", "replace")
-                except Exception:
-                    return '""'
-            return '"%s"' % data
-        return '""'
+        pointer = 0
+        header_skip = 0
+        # The whole inline buffer is always readable, so fetch all of it
+        window = INLINE_CAPACITY
+        content_address = buf.GetLoadAddress()
 
     # Static variant: discriminant is 0x18 (24)
     elif discriminant == 24:
-        # Get &str from $variant$24.value.__0
-        value = variant24.GetChildMemberWithName("value")
-        if not value.IsValid():
-            return '""'
+        variant_name = "Static"
 
-        str_ref = value.GetChildMemberWithName("__0")
+        # Get &str from $variant$24.value.__0
+        str_ref = _resolve_path(
+            repr_enum, type_key, ("$variants$", "$variant$24", "value", "__0")
+        )
         if not str_ref.IsValid():
-            return '""'
+            return (variant_name, 0, 0, 0, None)
 
         data_ptr = str_ref.GetChildMemberWithName("data_ptr")
         length_field = str_ref.GetChildMemberWithName("length")
 
         if not data_ptr.IsValid() or not length_field.IsValid():
-            return '""'
+            return (variant_name, 0, 0, 0, None)
 
-        length = length_field.GetValueAsUnsigned()
-        if length == 0:
-            return '""'
-
-        ptr = data_ptr.GetValueAsUnsigned()
-        error = SBError()
         process = data_ptr.GetProcess()
-        data = process.ReadMemory(ptr, length, error)
-        if error.Success():
-            if PY3:
-                try:
-                    data = data.decode("utf-8", "replace")
-                except Exception:
-                    return '""'
-            return '"%s"' % data
-        return '""'
+        length = length_field.GetValueAsUnsigned()
+        pointer = data_ptr.GetValueAsUnsigned()
+        header_skip = 0
+        window = SMALL_READ_WINDOW
+        content_address = pointer
 
     # Heap variant: discriminant >= 0x19 (25)
     else:
-        # Get Arc<str> from $variant$25.value.__0.ptr.pointer
-        variant25 = variants.GetChildMemberWithName("$variant$25")
-        if not variant25.IsValid():
-            return '""'
+        variant_name = "Heap"
 
-        value = variant25.GetChildMemberWithName("value")
-        if not value.IsValid():
-            return '""'
+        process = repr_enum.GetProcess()
+        fields = _read_heap_fields(repr_enum, type_key)
+        if fields is None:
+            return (variant_name, 0, 0, 0, None)
+        pointer, length = fields
 
-        inner = value.GetChildMemberWithName("__0")
-        if not inner.IsValid():
-            return '""'
+        # Arc<str> pointer points to ArcInner which has:
+        # - strong: AtomicUsize (8 bytes)
+        # - weak: AtomicUsize (8 bytes)
+        # - data: [u8] (the actual string)
+        # So we need to skip 16 bytes to get to the string data
+        header_skip = ARC_HEADER_SIZE
+        window = SMALL_READ_WINDOW
+        content_address = pointer + header_skip
 
-        ptr_field = inner.GetChildMemberWithName("ptr")
-        if not ptr_field.IsValid():
-            return '""'
+    if length == 0:
+        return (variant_name, 0, pointer, content_address, b"")
 
-        pointer = ptr_field.GetChildMemberWithName("pointer")
-        if not pointer.IsValid():
-            return '""'
+    if not read_content:
+        return (variant_name, length, pointer, content_address, None)
 
-        data_ptr = pointer.GetChildMemberWithName("data_ptr")
-        length_field = pointer.GetChildMemberWithName("length")
+    data = _read_string(
+        process, content_address - header_skip, length, header_skip, window
+    )
+    return (variant_name, length, pointer, content_address, data)
 
-        if not data_ptr.IsValid() or not length_field.IsValid():
-            return '""'
 
-        length = length_field.GetValueAsUnsigned()
-        if length == 0:
-            return '""'
+def SmolStrSummaryProvider(valobj: SBValue, _dict) -> str:
+    """
+    Summary provider for smol_str::SmolStr
 
-        ptr = data_ptr.GetValueAsUnsigned()
+    SmolStr uses an internal Repr enum with three variants:
+    - Inline (discriminant 0-23): small strings stored inline, discriminant is the length
+    - Static (discriminant 0x18=24): reference to static string
+    - Heap (discriminant >= 0x19=25): Arc-allocated string on heap
 
-        # Arc<str> pointer points to ArcInner which has:
-        # - strong: AtomicUsize (8 bytes)
-        # - weak: AtomicUsize (8 bytes)
-        # - data: [u8] (the actual string)
-        # So we need to skip 16 bytes to get to the string data
-        arc_header_size = 16
-        string_data_ptr = ptr + arc_header_size
+    Args:
+        valobj: The SmolStr value to format
+        _dict: LLDB internal bookkeeping parameter
 
-        error = SBError()
-        process = data_ptr.GetProcess()
-        data = process.ReadMemory(string_data_ptr, length, error)
-        if error.Success():
-            if PY3:
-                try:
-                    data = data.decode("utf-8", "replace")
-                except Exception:
-                    return '""'
-            return '"%s"' % data
+    Returns:
+        A string representation like "hello" with quotes
+    """
+    # Get the internal Repr enum
+    valobj = valobj.GetNonSyntheticValue()
+    _, length, _, _, data = _decode_smolstr(valobj.GetChildAtIndex(0))
+    if length == 0 or data is None:
         return '""'
+    return _fast_quote(data)
 
 
 class SmolStrSyntheticProvider:
@@ -190,9 +400,22 @@ class SmolStrSyntheticProvider:
         self.valobj = valobj
         self.variant_name = ""
         self.length = 0
-        self.content = ""
         self.pointer = 0
         self.content_address = 0  # Store address of string data
+
+        # Non-synthetic Repr child, reused while the SmolStr stays at one address
+        self.repr_enum = None
+        self.repr_address = lldb.LLDB_INVALID_ADDRESS
+
+        # Types and data layout used to build the children, resolved once
+        target = valobj.GetTarget()
+        self.char_type = target.GetBasicType(lldb.eBasicTypeChar)
+        self.char_array_types = {}  # char[N] types by N
+        self.length_type = target.GetBasicType(lldb.eBasicTypeUnsignedLongLong)
+        self.pointer_type = target.GetBasicType(lldb.eBasicTypeVoid).GetPointerType()
+        self.byte_order = target.GetByteOrder()
+        self.address_size = target.GetAddressByteSize()
+
         self.update()
 
     def num_children(self):
@@ -221,22 +444,15 @@ class SmolStrSyntheticProvider:
             if index == 0:
                 # variant field - return as string summary
                 # Create a value that will display the variant name
-                return self.valobj.CreateValueFromExpression(
-                    "variant", '(const char*)"%s"' % self.variant_name
-                )
+                return self._create_c_string("variant", self.variant_name)
             elif index == 1:
                 # length field - create as unsigned integer
-                return self.valobj.CreateValueFromExpression(
-                    "length", "(unsigned long long)%d" % self.length
-                )
+                return self._create_unsigned("length", self.length, self.length_type)
             elif index == 2:
                 # content field - create as char array pointing to actual data
                 if self.content_address != 0 and self.length > 0:
                     # Create char[length] type
-                    char_type = self.valobj.GetTarget().GetBasicType(
-                        lldb.eBasicTypeChar
-                    )
-                    char_array_type = char_type.GetArrayType(self.length)
+                    char_array_type = self._char_array_type(self.length)
 
                     # Create value from address
                     return self.valobj.CreateValueFromAddress(
@@ -244,187 +460,80 @@ class SmolStrSyntheticProvider:
                     )
                 else:
                     # Empty string
-                    return self.valobj.CreateValueFromExpression(
-                        "content", '(const char*)""'
-                    )
+                    return self._create_c_string("content", "")
             elif index == 3 and self.variant_name in ("Static", "Heap"):
                 # pointer field - create as hex pointer
-                return self.valobj.CreateValueFromExpression(
-                    "pointer", "(void*)0x%x" % self.pointer
-                )
+                return self._create_unsigned("pointer", self.pointer, self.pointer_type)
         except Exception:
             return None
 
         return None
 
+    def _create_c_string(self, name: str, text: str):
+        """Create a NUL-terminated char[N] child holding text"""
+        raw = text.encode("utf-8") + b"\0"
+        error = SBError()
+        data = lldb.SBData()
+        data.SetData(error, raw, self.byte_order, self.address_size)
+        if not error.Success():
+            return None
+        return self.valobj.CreateValueFromData(
+            name, data, self._char_array_type(len(raw))
+        )
+
+    def _char_array_type(self, length: int):
+        """Get char[length], created once per length for this provider"""
+        array_type = self.char_array_types.get(length)
+        if array_type is None:
+            array_type = self.char_type.GetArrayType(length)
+            self.char_array_types[length] = array_type
+        return array_type
+
+    def _create_unsigned(self, name: str, value: int, value_type):
+        """Create a child of an unsigned integer or pointer type holding value"""
+        if value_type.GetByteSize() == 4:
+            data = lldb.SBData.CreateDataFromUInt32Array(
+                self.byte_order, self.address_size, [value]
+            )
+        else:
+            data = lldb.SBData.CreateDataFromUInt64Array(
+                self.byte_order, self.address_size, [value]
+            )
+        return self.valobj.CreateValueFromData(name, data, value_type)
+
     def update(self):
         self.variant_name = ""
         self.length = 0
-        self.content = ""
         self.pointer = 0
         self.content_address = 0
 
         try:
-            valobj = self.valobj.GetNonSyntheticValue()
-            repr_enum = valobj.GetChildAtIndex(0)
-
-            # Get the $variants$ field (LLDB encoded enum)
-            variants = repr_enum.GetChildMemberWithName("$variants$")
-            if not variants.IsValid():
-                return
-
-            # Get discriminant from $variant$24 (which contains $discr$ field)
-            variant24 = variants.GetChildMemberWithName("$variant$24")
-            if not variant24.IsValid():
-                return
-
-            discr_field = variant24.GetChildMemberWithName("$discr$")
-            if not discr_field.IsValid():
-                return
-
-            discriminant = discr_field.GetValueAsUnsigned()
-
-            # Inline variant: discriminant is 0-23 (the length)
-            if discriminant <= 23:
-                self.variant_name = "Inline"
-                self.length = discriminant
-                if self.length == 0:
-                    self.content = ""
-                    return
-
-                # Get the inline buffer from $variant$
-                variant0 = variants.GetChildMemberWithName("$variant$")
-                if not variant0.IsValid():
-                    return
-
-                value = variant0.GetChildMemberWithName("value")
-                if not value.IsValid():
-                    return
-
-                buf = value.GetChildMemberWithName("buf")
-                if not buf.IsValid():
-                    return
-
-                # Store the address of the inline buffer
-                self.content_address = buf.GetLoadAddress()
-
-                # Read bytes from the buffer for summary
-                error = SBError()
-                process = buf.GetProcess()
-                data = process.ReadMemory(self.content_address, self.length, error)
-                if error.Success():
-                    if PY3:
-                        try:
-                            self.content = data.decode("utf-8", "replace")
-                        except Exception:
-                            self.content = ""
-                    else:
-                        self.content = data
-
-            # Static variant: discriminant is 0x18 (24)
-            elif discriminant == 24:
-                self.variant_name = "Static"
-
-                # Get &str from $variant$24.value.__0
-                value = variant24.GetChildMemberWithName("value")
-                if not value.IsValid():
-                    return
-
-                str_ref = value.GetChildMemberWithName("__0")
-                if not str_ref.IsValid():
-                    return
-
-                data_ptr = str_ref.GetChildMemberWithName("data_ptr")
-                length_field = str_ref.GetChildMemberWithName("length")
-
-                if not data_ptr.IsValid() or not length_field.IsValid():
-                    return
-
-                self.length = length_field.GetValueAsUnsigned()
-                self.pointer = data_ptr.GetValueAsUnsigned()
-                self.content_address = self.pointer
-
-                if self.length == 0:
-                    self.content = ""
-                    return
-
-                error = SBError()
-                process = data_ptr.GetProcess()
-                data = process.ReadMemory(self.pointer, self.length, error)
-                if error.Success():
-                    if PY3:
-                        try:
-                            self.content = data.decode("utf-8", "replace")
-                        except Exception:
-                            self.content = ""
-                    else:
-                        self.content = data
-
-            # Heap variant: discriminant >= 0x19 (25)
-            else:
-                self.variant_name = "Heap"
-
-                # Get Arc<str> from $variant$25.value.__0.ptr.pointer
-                variant25 = variants.GetChildMemberWithName("$variant$25")
-                if not variant25.IsValid():
-                    return
-
-                value = variant25.GetChildMemberWithName("value")
-                if not value.IsValid():
-                    return
-
-                inner = value.GetChildMemberWithName("__0")
-                if not inner.IsValid():
-                    return
-
-                ptr_field = inner.GetChildMemberWithName("ptr")
-                if not ptr_field.IsValid():
-                    return
-
-                pointer = ptr_field.GetChildMemberWithName("pointer")
-                if not pointer.IsValid():
-                    return
-
-                data_ptr = pointer.GetChildMemberWithName("data_ptr")
-                length_field = pointer.GetChildMemberWithName("length")
-
-                if not data_ptr.IsValid() or not length_field.IsValid():
-                    return
-
-                self.length = length_field.GetValueAsUnsigned()
-                self.pointer = data_ptr.GetValueAsUnsigned()
-
-                if self.length == 0:
-                    self.content = ""
-                    return
-
-                # Arc<str> pointer points to ArcInner which has:
-                # - strong: AtomicUsize (8 bytes)
-                # - weak: AtomicUsize (8 bytes)
-                # - data: [u8] (the actual string)
-                # So we need to skip 16 bytes to get to the string data
-                arc_header_size = 16
-                string_data_ptr = self.pointer + arc_header_size
-                self.content_address = string_data_ptr
-
-                error = SBError()
-                process = data_ptr.GetProcess()
-                data = process.ReadMemory(string_data_ptr, self.length, error)
-                if error.Success():
-                    if PY3:
-                        try:
-                            self.content = data.decode("utf-8", "replace")
-                        except Exception:
-                            self.content = ""
-                    else:
-                        self.content = data
+            address = self.valobj.GetLoadAddress()
+            if (
+                self.repr_enum is None
+                or address == lldb.LLDB_INVALID_ADDRESS
+                or address != self.repr_address
+            ):
+                valobj = self.valobj.GetNonSyntheticValue()
+                self.repr_enum = valobj.GetChildAtIndex(0)
+                self.repr_address = address
+
+            # The content child reads the string from content_address itself,
+            # so only the layout is needed here
+            (
+                self.variant_name,
+                self.length,
+                self.pointer,
+                self.content_address,
+                _,
+            ) = _decode_smolstr(self.repr_enum, read_content=False)
 
         except Exception:
             self.variant_name = ""
             self.length = 0
-            self.content = ""
             self.pointer = 0
             self.content_address = 0
+            self.repr_enum = None
 
     def has_children(self):
         return True
@@ -448,6 +557,18 @@ def SmallVecSummaryProvider(valobj: SBValue, _dict) -> str:
         A string representation showing size like "size=4"
     """
     valobj = valobj.GetNonSyntheticValue()
+    type_key = _type_key(valobj)
+
+    # Fast path: read len straight from the value's data at its offset
+    layout = _SMALLVEC_LEN_LAYOUT.get(type_key)
+    if layout is None:
+        layout = _field_layout(valobj.GetType(), ("len", "__0"))
+        if layout is not None and type_key is not None:
+            _SMALLVEC_LEN_LAYOUT[type_key] = layout
+    if layout is not None:
+        len_value = _read_data_unsigned(valobj.GetData(), *layout)
+        if len_value is not None:
+            return "size=%d" % (len_value >> 1)
 
     # Get the len field
     len_field = valobj.GetChildMemberWithName("len")
@@ -479,37 +600,57 @@ class SmallVecSyntheticProvider:
         self.is_heap = False
         self.heap_ptr = 0
         self.inline_data_address = 0
-        self.element_size = 0
-        self.element_type = None
+        self.element_type, self.element_size = self._resolve_element_type()
+        self.prefetched = False  # Whether the leading elements were read
         self.update()
 
+    def _resolve_element_type(self) -> tuple[SBType, int]:
+        """Look up the SmallVec<T, N> template argument once per type"""
+        valobj = self.valobj.GetNonSyntheticValue()
+        type_key = _type_key(valobj)
+        cached = _ELEM_TYPE_CACHE.get(type_key)
+        if cached is not None:
+            return cached
+
+        element_type = valobj.GetType().GetTemplateArgumentType(0)
+        if not element_type.IsValid():
+            return (element_type, 0)
+
+        # Types that fail to resolve are retried rather than cached
+        element_size = element_type.GetByteSize()
+        if element_size > 0 and type_key is not None:
+            _ELEM_TYPE_CACHE[type_key] = (element_type, element_size)
+        return (element_type, element_size)
+
     def num_children(self):
         return self.length
 
     def get_child_index(self, name: str):
-        try:
-            return int(name.lstrip("[").rstrip("]"))
-        except Exception:
-            return -1
+        # Only "[N]" names are elements; LLDB also asks for names such as
+        # "$$dereference$$", so check the shape instead of catching errors
+        if len(name) >= 3 and name[0] == "[" and name[-1] == "]":
+            digits = name[1:-1]
+            if digits.isascii() and digits.isdigit():
+                return int(digits)
+        return -1
 
     def get_child_at_index(self, index: int):
+        # update() leaves length at 0 unless the element type is valid
         if index < 0 or index >= self.length:
             return None
 
-        if not self.element_type or not self.element_type.IsValid():
-            return None
-
-        if self.element_size == 0:
-            return None
-
         try:
+            if not self.prefetched:
+                self.prefetched = True
+                self._prefetch()
+
             if self.is_heap:
                 # Read from heap - calculate address and create value
                 if self.heap_ptr == 0:
                     return None
                 address = self.heap_ptr + index * self.element_size
                 element = self.valobj.CreateValueFromAddress(
-                    "[%d]" % index, address, self.element_type
+                    f"[{index}]", address, self.element_type
                 )
                 return element
             else:
@@ -518,20 +659,32 @@ class SmallVecSyntheticProvider:
                     return None
                 address = self.inline_data_address + index * self.element_size
                 element = self.valobj.CreateValueFromAddress(
-                    "[%d]" % index, address, self.element_type
+                    f"[{index}]", address, self.element_type
                 )
                 return element
 
         except Exception:
             return None
 
+    def _prefetch(self):
+        """
+        Read the leading elements with a single ReadMemory
+
+        The result is discarded: the read fills LLDB's memory cache, so the
+        CreateValueFromAddress children below are served without one inferior
+        round-trip each. Only the elements LLDB displays by default are read.
+        """
+        base = self.heap_ptr if self.is_heap else self.inline_data_address
+        size = min(self.length, PREFETCH_ELEMENTS) * self.element_size
+        if 0 < size <= MAX_BULK_READ_SIZE:
+            self.valobj.GetProcess().ReadMemory(base, size, SBError())
+
     def update(self):
         self.length = 0
         self.is_heap = False
         self.heap_ptr = 0
         self.inline_data_address = 0
-        self.element_size = 0
-        self.element_type = None
+        self.prefetched = False
 
         try:
             valobj = self.valobj.GetNonSyntheticValue()
@@ -553,13 +706,7 @@ class SmallVecSyntheticProvider:
             # Extract actual length (len >> 1)
             self.length = len_value >> 1
 
-            # Get element type from SmallVec<T, N> template argument
-            self.element_type = valobj.GetType().GetTemplateArgumentType(0)
-            if not self.element_type.IsValid():
-                self.length = 0
-                return
-
-            self.element_size = self.element_type.GetByteSize()
+            # Element type was resolved from the template argument in __init__
             if self.element_size == 0:
                 self.length = 0
                 return
@@ -616,7 +763,7 @@ class SmallVecSyntheticProvider:
 
                 # Get the address of the inline array
                 self.inline_data_address = value_array.GetLoadAddress()
-                if self.inline_data_address == 0:
+                if self.inline_data_address in (0, lldb.LLDB_INVALID_ADDRESS):
                     self.length = 0
                     return
 
@@ -789,6 +936,19 @@ def OptionSummaryProvider(valobj: SBValue, _dict) -> str:
     return "<Option>"
 
 
+# (type name pattern, is regex, summary function, synthetic class or None)
+REGISTRATIONS = [
+    ("smol_str::SmolStr", False, "SmolStrSummaryProvider", "SmolStrSyntheticProvider"),
+    (
+        "^smallvec::SmallVec<.+>$",
+        True,
+        "SmallVecSummaryProvider",
+        "SmallVecSyntheticProvider",
+    ),
+    ("^core::option::Option<.+>$", True, "OptionSummaryProvider", None),
+]
+
+
 def __lldb_init_module(debugger: lldb.SBDebugger, _internal_dict):
     """
     This function is called by LLDB when the module is loaded.
@@ -804,54 +964,24 @@ def __lldb_init_module(debugger: lldb.SBDebugger, _internal_dict):
         category = debugger.CreateCategory(category_name)
         category.SetEnabled(True)
 
-    # Register SmolStr summary provider
-    summary_options = lldb.SBTypeNameSpecifier(
-        "smol_str::SmolStr", lldb.eFormatterMatchExact
-    )
-    summary = lldb.SBTypeSummary.CreateWithFunctionName(
-        "rust_bonus_types.SmolStrSummaryProvider"
-    )
-    summary.SetOptions(lldb.eTypeOptionCascade)
-    category.AddTypeSummary(summary_options, summary)
-
-    # Register SmolStr synthetic provider
-    synth_options = lldb.SBTypeNameSpecifier(
-        "smol_str::SmolStr", lldb.eFormatterMatchExact
-    )
-    synth = lldb.SBTypeSynthetic.CreateWithClassName(
-        "rust_bonus_types.SmolStrSyntheticProvider"
-    )
-    synth.SetOptions(lldb.eTypeOptionCascade)
-    category.AddTypeSynthetic(synth_options, synth)
-
-    # Register SmallVec summary provider
-    summary_options = lldb.SBTypeNameSpecifier(
-        "^smallvec::SmallVec<.+>$", lldb.eFormatterMatchRegex
-    )
-    summary = lldb.SBTypeSummary.CreateWithFunctionName(
-        "rust_bonus_types.SmallVecSummaryProvider"
-    )
-    summary.SetOptions(lldb.eTypeOptionCascade)
-    category.AddTypeSummary(summary_options, summary)
-
-    # Register SmallVec synthetic provider
-    synth_options = lldb.SBTypeNameSpecifier(
-        "^smallvec::SmallVec<.+>$", lldb.eFormatterMatchRegex
-    )
-    synth = lldb.SBTypeSynthetic.CreateWithClassName(
-        "rust_bonus_types.SmallVecSyntheticProvider"
-    )
-    synth.SetOptions(lldb.eTypeOptionCascade)
-    category.AddTypeSynthetic(synth_options, synth)
-
-    # Register Option<T> summary provider
-    option_summary_options = lldb.SBTypeNameSpecifier(
-        "^core::option::Option<.+>$", lldb.eFormatterMatchRegex
-    )
-    option_summary = lldb.SBTypeSummary.CreateWithFunctionName(
-        "rust_bonus_types.OptionSummaryProvider"
-    )
-    option_summary.SetOptions(lldb.eTypeOptionCascade)
-    category.AddTypeSummary(option_summary_options, option_summary)
+    for pattern, is_regex, summary_name, synthetic_name in REGISTRATIONS:
+        match_type = (
+            lldb.eFormatterMatchRegex if is_regex else lldb.eFormatterMatchExact
+        )
+
+        summary = lldb.SBTypeSummary.CreateWithFunctionName(
+            "rust_bonus_types.%s" % summary_name
+        )
+        summary.SetOptions(lldb.eTypeOptionCascade)
+        category.AddTypeSummary(lldb.SBTypeNameSpecifier(pattern, match_type), summary)
+
+        if synthetic_name is not None:
+            synth = lldb.SBTypeSynthetic.CreateWithClassName(
+                "rust_bonus_types.%s" % synthetic_name
+            )
+            synth.SetOptions(lldb.eTypeOptionCascade)
+            category.AddTypeSynthetic(
+                lldb.SBTypeNameSpecifier(pattern, match_type), synth
+            )
 
     print("✓ Rust bonus types loaded: SmolStr, SmallVec, Option")